@@ -0,0 +1,61 @@
+"""Benchmark tap startup: stream construction and schema loading.
+
+Run with ``uv run python benchmarks/bench_startup.py``. Each scenario builds a fresh tap
+and resolves its streams and catalog, which is the fixed cost paid by every tap
+invocation before the first request is sent.
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+import typing as t
+
+from tap_visma_service.client import SCHEMA_BUNDLE
+from tap_visma_service.tap import TapVismaService
+
+CONFIG = {"client_id": "client-id", "client_secret": "client-secret"}
+ROUNDS = 50
+
+
+def _catalog_selecting(*stream_names: str) -> dict:
+    catalog = TapVismaService(config=CONFIG).catalog_dict
+    for entry in catalog["streams"]:
+        for metadata in entry["metadata"]:
+            if metadata["breadcrumb"] == []:
+                metadata["metadata"]["selected"] = entry["tap_stream_id"] in stream_names
+    return catalog
+
+
+def _bench(label: str, build: t.Callable[[], object]) -> None:
+    timings = []
+    for _ in range(ROUNDS):
+        # Drop the parsed bundle so every round pays the cold schema load.
+        SCHEMA_BUNDLE.__dict__.pop("bundle", None)
+        SCHEMA_BUNDLE._schema_cache.clear()  # noqa: SLF001
+        start = time.perf_counter()
+        build()
+        timings.append(time.perf_counter() - start)
+    print(  # noqa: T201
+        f"{label:<40} median {statistics.median(timings) * 1000:7.2f} ms  "
+        f"min {min(timings) * 1000:7.2f} ms"
+    )
+
+
+def main() -> None:
+    """Run the startup benchmarks."""
+    single = _catalog_selecting("suppliers")
+    child = _catalog_selecting("general_ledger_transactions")
+    everything = _catalog_selecting(*(entry["tap_stream_id"] for entry in single["streams"]))
+
+    _bench("discovery (all streams)", lambda: TapVismaService(config=CONFIG).catalog_dict)
+    _bench("catalog: all streams selected", lambda: TapVismaService(
+        config=CONFIG, catalog=everything).streams)
+    _bench("catalog: one stream selected", lambda: TapVismaService(
+        config=CONFIG, catalog=single).streams)
+    _bench("catalog: one child stream selected", lambda: TapVismaService(
+        config=CONFIG, catalog=child).streams)
+
+
+if __name__ == "__main__":
+    main()
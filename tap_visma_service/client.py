@@ -5,15 +5,21 @@ from __future__ import annotations
 import decimal
 import sys
 import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from functools import cached_property
-from importlib import resources
 
+from singer_sdk import metrics
 from singer_sdk.helpers.jsonpath import extract_jsonpath
-from singer_sdk.pagination import BaseAPIPaginator  # noqa: TC002
+from singer_sdk.pagination import BaseAPIPaginator, SinglePagePaginator
+from singer_sdk.schema.source import StreamSchema
 from singer_sdk.streams import RESTStream
 from typing import Any, Dict, Optional, cast, Iterable
 
 from tap_visma_service.auth import VismaServiceAuthenticator
+from tap_visma_service.pipeline import PagePipeline
+from tap_visma_service.reconciliation import KeyIndex, RecordKey
+from tap_visma_service.schemas import SchemaBundle
 
 if sys.version_info >= (3, 12):
     from typing import override
@@ -25,8 +31,11 @@ if t.TYPE_CHECKING:
     from singer_sdk.helpers.types import Auth, Context
 
 
-# TODO: Delete this is if not using json files for schema definition
-SCHEMAS_DIR = resources.files(__package__) / "schemas"
+# Shared by every stream so the schema bundle is read at most once per process.
+SCHEMA_BUNDLE = SchemaBundle()
+
+# Partition state key holding the time of the last deletion reconciliation.
+RECONCILED_AT_KEY = "reconciled_at"
 
     
 class PageNumberPaginator(BaseAPIPaginator[int]):
@@ -63,6 +72,63 @@ class VismaServiceStream(RESTStream):
     # Update this value if necessary or override `parse_response`.
     records_jsonpath = "$[*]"
 
+    # Resolved lazily from the bundle, keyed by stream name.
+    schema = StreamSchema(SCHEMA_BUNDLE)
+
+    # Whether deleted records are detected by periodically diffing primary keys.
+    # Streams enabling this must declare `_sdc_deleted_at` in their schema.
+    supports_key_reconciliation = False
+
+    # Whether every shard extracts this stream, each taking a subset of its
+    # partitions. Other streams are extracted whole by a single shard.
+    splits_across_shards = False
+
+    # Values of the context slice being extracted, see `get_context_slices`.
+    current_slice: dict = {}  # noqa: RUF012
+
+    @property
+    @override
+    def selected(self) -> bool:
+        """Check if stream is selected, and extracted by this process's shard.
+
+        Returns:
+            True if the stream is selected.
+        """
+        selected = RESTStream.selected.fget(self)  # type: ignore[attr-defined]
+        return selected and (self.splits_across_shards or self.shard_owns(self.name))
+
+    @selected.setter
+    def selected(self, value: bool | None) -> None:
+        RESTStream.selected.fset(self, value)  # type: ignore[attr-defined]
+
+    def shard_owns(self, *partition: t.Any) -> bool:
+        """Return whether this process's shard extracts the given partition."""
+        shard = self._tap.shard  # type: ignore[attr-defined]
+        return shard is None or shard.owns(*partition)
+
+    def get_period_list(self) -> list[str]:
+        """Generate all YYYYMM period IDs from start_date up to today."""
+        if self.config.get("start_date"):
+            start_date = datetime.fromisoformat(
+                self.config["start_date"].replace("Z", "").replace("T", " ")
+            )
+        else:
+            start_date = datetime(2023, 1, 1)
+
+        end_date = datetime.today()
+        periods = []
+
+        current = start_date
+        while current <= end_date:
+            periods.append(current.strftime("%Y%m"))
+            # Move to next month
+            if current.month == 12:
+                current = current.replace(year=current.year + 1, month=1)
+            else:
+                current = current.replace(month=current.month + 1)
+
+        return periods
+
     # # Update this value if necessary or override `get_new_paginator`.
     # next_page_token_jsonpath = "$.next_page"  # noqa: S105
 
@@ -124,6 +190,271 @@ class VismaServiceStream(RESTStream):
         return params
     
 
+    def fetch_pages(self, context: Context | None) -> t.Iterator[tuple[list[dict], int]]:
+        """Request every page of records for a context.
+
+        This runs on the prefetch thread when prefetching is enabled, so it must
+        not touch state read by the record writer.
+
+        Args:
+            context: The stream context.
+
+        Yields:
+            The records of each non-empty page, with the response size in bytes.
+        """
+        paginator = self.get_new_paginator() or SinglePagePaginator()
+        decorated_request = self.request_decorator(self._request)
+
+        with metrics.http_request_counter(self.name, self.path) as request_counter:
+            request_counter.context = context
+
+            while not paginator.finished:
+                prepared_request = self.prepare_request(
+                    context,
+                    next_page_token=paginator.current_value,
+                )
+                response = decorated_request(prepared_request, context)
+                request_counter.increment()
+                self.update_sync_costs(prepared_request, response, context)
+                records = list(self.parse_response(response))
+                if not records and not paginator.continue_if_empty(response):
+                    break
+                if records:
+                    yield records, len(response.content)
+                paginator.advance(response)
+
+    @override
+    def request_records(self, context: Context | None) -> t.Iterable[dict]:
+        """Request records, fetching pages ahead of the record writer.
+
+        Pages from :meth:`fetch_pages` are handed over through a
+        :class:`~tap_visma_service.pipeline.PagePipeline` bounded by the
+        ``prefetch_max_pages`` and ``prefetch_max_bytes`` settings, so memory stays
+        flat however large the tenant is.
+
+        Args:
+            context: The stream context.
+
+        Yields:
+            Each record from the source.
+        """
+        if not self.config["prefetch_max_pages"]:
+            for records, _ in self.fetch_pages(context):
+                yield from records
+            return
+
+        pipeline: PagePipeline[list[dict]] = PagePipeline(
+            max_pages=self.config["prefetch_max_pages"],
+            max_bytes=self.config["prefetch_max_bytes"],
+        )
+        try:
+            for records in pipeline.run(self.fetch_pages(context), name=f"{self.name}-fetch"):
+                yield from records
+        finally:
+            stats = pipeline.stats
+            self.logger.info(
+                "Fetched %d pages (%d bytes) for context %s; fetching blocked %.2fs "
+                "on a full queue, writing blocked %.2fs on an empty one",
+                stats.pages,
+                stats.bytes,
+                context,
+                stats.producer_blocked_seconds,
+                stats.consumer_blocked_seconds,
+            )
+
+    @property
+    def reconciles_keys(self) -> bool:
+        """Whether this sync keeps a key index and reports deleted records.
+
+        Streams extracted only for their child contexts, including streams owned
+        by another shard, emit nothing and so keep no key index.
+        """
+        return (
+            self.supports_key_reconciliation
+            and self.config.get("reconciliation_interval_hours") is not None
+            and self.selected
+        )
+
+    def get_context_slices(self, context: Context | None) -> list[dict]:
+        """Return the slices a context is extracted in, one after another.
+
+        Each slice is fetched, indexed and reconciled on its own. Its values are
+        available to :meth:`get_url_params` as ``current_slice`` while it is
+        extracted. By default the whole context is a single slice.
+
+        Args:
+            context: The stream context.
+
+        Returns:
+            A list of slice values, added to the context to identify each slice.
+        """
+        return [{}]
+
+    @override
+    def get_records(self, context: Context | None) -> t.Iterable[dict]:
+        """Return records, followed by deletion markers when a reconciliation is due.
+
+        Args:
+            context: The stream context.
+
+        Yields:
+            Each record from the source, then a deletion marker for each record
+            that no longer exists.
+        """
+        reconcile = self.reconciles_keys
+        for context_slice in self.get_context_slices(context):
+            self.current_slice = context_slice
+            if reconcile:
+                yield from self._get_reconciled_records(context, context_slice)
+            else:
+                yield from super().get_records(context)
+
+        self.current_slice = {}
+
+    def _get_reconciled_records(
+        self,
+        context: Context | None,
+        context_slice: dict,
+    ) -> t.Iterable[dict]:
+        slice_context = {**(context or {}), **context_slice} or None
+        key_index = KeyIndex.for_context(
+            self.config["key_index_dir"],
+            self.name,
+            slice_context,
+            self.get_context_state(slice_context).get(RECONCILED_AT_KEY),
+        )
+        for record in super().get_records(context):
+            key_index.add(self.get_record_key(record))
+            yield record
+
+        if self.is_reconciliation_due(slice_context):
+            reconciled_at = datetime.now(timezone.utc).isoformat()
+            deleted = key_index.replace(self.fetch_record_keys(context), reconciled_at)
+            self.logger.info(
+                "Reconciled keys for %s: %d deleted records", slice_context, len(deleted)
+            )
+            for key in deleted:
+                yield self.get_deletion_marker(key, reconciled_at)
+            self.get_context_state(slice_context)[RECONCILED_AT_KEY] = reconciled_at
+
+        key_index.save()
+
+    def get_record_key(self, record: dict) -> RecordKey:
+        """Return the primary key values of a record.
+
+        Decimals are kept as strings so keys survive the key index's JSON file.
+        """
+        return tuple(
+            str(value) if isinstance(value, decimal.Decimal) else value
+            for value in (record.get(key) for key in self.primary_keys)
+        )
+
+    def get_deletion_marker(self, key: RecordKey, deleted_at: str) -> dict:
+        """Return a record flagging the record with the given key as deleted."""
+        marker: dict[str, t.Any] = dict(zip(self.primary_keys, key))
+        for name, value in marker.items():
+            property_types = self.schema["properties"].get(name, {}).get("type", [])
+            if isinstance(value, str) and "number" in property_types:
+                marker[name] = decimal.Decimal(value)
+        if self.replication_key:
+            marker[self.replication_key] = None
+        marker["_sdc_deleted_at"] = deleted_at
+        return marker
+
+    @override
+    def _increment_stream_state(
+        self,
+        latest_record: dict,
+        *,
+        context: Context | None = None,
+    ) -> None:
+        # Deletion markers carry no replication key value to advance the bookmark with.
+        if latest_record.get("_sdc_deleted_at") is not None:
+            return
+        super()._increment_stream_state(latest_record, context=context)
+
+    def is_reconciliation_due(self, context: Context | None) -> bool:
+        """Return whether the reconciliation interval elapsed for this context."""
+        reconciled_at = self.get_context_state(context).get(RECONCILED_AT_KEY)
+        if reconciled_at is None:
+            return True
+        interval = timedelta(hours=self.config["reconciliation_interval_hours"])
+        return datetime.fromisoformat(reconciled_at) + interval <= datetime.now(timezone.utc)
+
+    def get_reconciliation_url_params(
+        self,
+        context: Context | None,
+        next_page_token: t.Any | None,
+    ) -> dict[str, t.Any]:
+        """Return the URL params of a keys-only request.
+
+        The regular params are reused so the same records are in scope, minus the
+        ``expand*``/``include*`` flags that only enrich the response.
+        """
+        params = self.get_url_params(context, next_page_token)
+        return {
+            key: value
+            for key, value in params.items()
+            if not key.startswith(("expand", "include"))
+        }
+
+    def fetch_record_keys(self, context: Context | None) -> set[RecordKey]:
+        """Fetch the primary keys of every record currently present at the source.
+
+        Pages are requested ``reconciliation_max_workers`` at a time until one comes
+        back short. Requests are prepared on the calling thread so that token
+        refreshes are not raced by the workers.
+
+        Args:
+            context: The stream context.
+
+        Returns:
+            The set of primary keys.
+        """
+        paginator = self.get_new_paginator()
+        page_size = getattr(paginator, "page_size", None)
+        paginated = page_size is not None and "pageNumber" in self.get_url_params(context, 1)
+        max_workers = self.config["reconciliation_max_workers"] if paginated else 1
+        decorated_request = self.request_decorator(self._request)
+
+        def fetch_page(
+            prepared_request: requests.PreparedRequest,
+        ) -> tuple[requests.Response, list[RecordKey]]:
+            response = decorated_request(prepared_request, context)
+            return response, [self.get_record_key(row) for row in self.parse_response(response)]
+
+        keys: set[RecordKey] = set()
+        page_number = 1
+        with (
+            metrics.http_request_counter(self.name, self.path) as request_counter,
+            ThreadPoolExecutor(max_workers=max_workers) as executor,
+        ):
+            request_counter.context = context
+            while True:
+                prepared_requests = []
+                for page in range(page_number, page_number + max_workers):
+                    params = self.get_reconciliation_url_params(context, page)
+                    if paginated:
+                        params["pageSize"] = page_size
+                    prepared_requests.append(
+                        self.build_prepared_request(
+                            method=self.http_method,
+                            url=self.get_url(context),
+                            params=params,
+                            headers=self.http_headers,
+                            auth=self.authenticator,
+                        )
+                    )
+                pages = list(executor.map(fetch_page, prepared_requests))
+                # Metrics are recorded on the calling thread, as in `fetch_pages`.
+                for prepared_request, (response, page_keys) in zip(prepared_requests, pages):
+                    request_counter.increment()
+                    self.update_sync_costs(prepared_request, response, context)
+                    keys.update(page_keys)
+                if not paginated or any(len(page_keys) < page_size for _, page_keys in pages):
+                    return keys
+                page_number += max_workers
+
     @override
     def prepare_request_payload(
         self,
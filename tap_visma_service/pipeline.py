@@ -0,0 +1,156 @@
+"""Bounded hand-off of fetched pages from a network thread to the record writer."""
+
+from __future__ import annotations
+
+import threading
+import time
+import typing as t
+from collections import deque
+from dataclasses import dataclass
+
+T = t.TypeVar("T")
+
+
+class PipelineCancelledError(Exception):
+    """Raised in the producer when the consumer stopped reading."""
+
+
+@dataclass
+class PipelineStats:
+    """Counters describing how a pipeline run went."""
+
+    pages: int = 0
+    bytes: int = 0
+    producer_blocked_seconds: float = 0.0
+    consumer_blocked_seconds: float = 0.0
+
+
+class PagePipeline(t.Generic[T]):
+    """Bounded queue of pages between one producer thread and one consumer.
+
+    The producer blocks once ``max_pages`` pages or ``max_bytes`` bytes are waiting,
+    so at most that much plus the page in each side's hands is held in memory,
+    however large the source is. A page bigger than ``max_bytes`` is still let
+    through when the queue is empty, otherwise it could never be delivered.
+    """
+
+    def __init__(self, max_pages: int, max_bytes: int) -> None:
+        """Create an empty pipeline.
+
+        Args:
+            max_pages: Maximum number of queued pages.
+            max_bytes: Maximum total size of queued pages.
+        """
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.stats = PipelineStats()
+        self._queue: deque[tuple[T, int]] = deque()
+        self._queued_bytes = 0
+        self._closed = False
+        self._cancelled = False
+        self._error: BaseException | None = None
+        self._condition = threading.Condition()
+
+    def _is_full(self, size: int) -> bool:
+        return bool(self._queue) and (
+            len(self._queue) >= self.max_pages or self._queued_bytes + size > self.max_bytes
+        )
+
+    def put(self, page: T, size: int) -> None:
+        """Queue a page, blocking while the pipeline is full.
+
+        Args:
+            page: The page to hand over.
+            size: The page size in bytes.
+
+        Raises:
+            PipelineCancelledError: If the consumer stopped reading.
+        """
+        with self._condition:
+            if self._is_full(size) and not self._cancelled:
+                start = time.perf_counter()
+                self._condition.wait_for(lambda: self._cancelled or not self._is_full(size))
+                self.stats.producer_blocked_seconds += time.perf_counter() - start
+            if self._cancelled:
+                raise PipelineCancelledError
+            self._queue.append((page, size))
+            self._queued_bytes += size
+            self.stats.pages += 1
+            self.stats.bytes += size
+            self._condition.notify_all()
+
+    def close(self, error: BaseException | None = None) -> None:
+        """Signal that no more pages will be produced.
+
+        Args:
+            error: The exception that stopped the producer, re-raised to the consumer.
+        """
+        with self._condition:
+            self._closed = True
+            self._error = error
+            self._condition.notify_all()
+
+    def cancel(self) -> None:
+        """Stop the producer, dropping any queued pages."""
+        with self._condition:
+            self._cancelled = True
+            self._queue.clear()
+            self._queued_bytes = 0
+            self._condition.notify_all()
+
+    def __iter__(self) -> t.Iterator[T]:
+        """Yield queued pages in order until the producer closes the pipeline.
+
+        Raises:
+            BaseException: Whatever error the producer closed the pipeline with.
+        """
+        while True:
+            with self._condition:
+                if not self._queue and not self._closed:
+                    start = time.perf_counter()
+                    self._condition.wait_for(lambda: self._queue or self._closed)
+                    self.stats.consumer_blocked_seconds += time.perf_counter() - start
+                if not self._queue:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                page, size = self._queue.popleft()
+                self._queued_bytes -= size
+                self._condition.notify_all()
+            yield page
+
+    def run(self, pages: t.Iterable[tuple[T, int]], *, name: str) -> t.Iterator[T]:
+        """Produce ``pages`` on a background thread and yield them on this one.
+
+        Args:
+            pages: An iterable of ``(page, size in bytes)`` tuples, consumed by the
+                producer thread.
+            name: The producer thread name.
+
+        Yields:
+            Each page, in production order.
+        """
+        iterator = iter(pages)
+
+        def produce() -> None:
+            try:
+                for page, size in iterator:
+                    self.put(page, size)
+            except PipelineCancelledError:
+                pass
+            except BaseException as e:  # noqa: BLE001
+                self.close(e)
+                return
+            finally:
+                # Finalize generators on this thread rather than when collected.
+                if isinstance(iterator, t.Generator):
+                    iterator.close()
+            self.close()
+
+        producer = threading.Thread(target=produce, name=name, daemon=True)
+        producer.start()
+        try:
+            yield from self
+        finally:
+            self.cancel()
+            producer.join()
@@ -0,0 +1,129 @@
+"""Primary key index used to detect deleted records."""
+
+from __future__ import annotations
+
+import json
+import re
+import tempfile
+import typing as t
+from pathlib import Path
+
+if t.TYPE_CHECKING:
+    from singer_sdk.helpers.types import Context
+
+RecordKey = tuple[t.Any, ...]
+
+
+class KeyIndex:
+    """File-backed set of the primary keys seen for one stream partition.
+
+    Normal syncs add the keys of every record they emit. A reconciliation then
+    swaps the whole set for the keys currently returned by the API; whatever is
+    left over has been deleted or voided at the source.
+
+    The index only advances with the Singer state. A reconciliation is stored with
+    its ``reconciled_at`` time and the keys it found deleted. Until the partition
+    state committed by the orchestrator carries that same time, those keys stay
+    pending: loading the index against any other state puts them back, so a run
+    that repeats the reconciliation emits their deletion markers again.
+    """
+
+    def __init__(self, path: Path, reconciled_at: str | None = None) -> None:
+        """Load the index stored at ``path``, or start an empty one.
+
+        Args:
+            path: The JSON file backing this index.
+            reconciled_at: The last reconciliation time in the partition's input
+                state, if any.
+        """
+        self.path = path
+        self.keys: set[RecordKey] = set()
+        self.pending_deletions: set[RecordKey] = set()
+        self.reconciled_at = reconciled_at
+        self.changed = False
+        if not path.is_file():
+            return
+
+        stored = json.loads(path.read_text(encoding="utf-8"))
+        self.keys = {tuple(key) for key in stored["keys"]}
+        if stored["reconciled_at"] != reconciled_at and stored["pending_deletions"]:
+            # The stored reconciliation never made it into the committed state.
+            self.keys.update(tuple(key) for key in stored["pending_deletions"])
+            self.changed = True
+
+    @classmethod
+    def for_context(
+        cls,
+        root: str | Path,
+        stream_name: str,
+        context: Context | None,
+        reconciled_at: str | None = None,
+    ) -> KeyIndex:
+        """Return the index of one stream partition.
+
+        Args:
+            root: The directory holding all key indexes.
+            stream_name: The stream name.
+            context: The stream partition, or ``None`` for unpartitioned streams.
+            reconciled_at: The last reconciliation time in the partition's input
+                state, if any.
+
+        Returns:
+            The key index for the partition.
+        """
+        partition = "__".join(f"{key}={value}" for key, value in sorted((context or {}).items()))
+        filename = re.sub(r"[^\w=.-]", "_", partition) or "_"
+        return cls(Path(root) / stream_name / f"{filename}.json", reconciled_at)
+
+    def add(self, key: RecordKey) -> None:
+        """Record a key as present.
+
+        Args:
+            key: The primary key values of a record.
+        """
+        if key not in self.keys:
+            self.keys.add(key)
+            self.changed = True
+
+    def replace(self, current_keys: set[RecordKey], reconciled_at: str) -> set[RecordKey]:
+        """Replace the indexed keys with the keys currently present at the source.
+
+        Args:
+            current_keys: Every key returned by the source.
+            reconciled_at: The time of this reconciliation, as written to the state.
+
+        Returns:
+            The keys that were indexed but are no longer present.
+        """
+        self.pending_deletions = self.keys - current_keys
+        self.keys = current_keys
+        self.reconciled_at = reconciled_at
+        self.changed = True
+        return self.pending_deletions
+
+    def save(self) -> None:
+        """Persist the index, replacing the previous file atomically.
+
+        Does nothing if the index has not changed since it was loaded.
+        """
+        if not self.changed:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=self.path.parent,
+            suffix=".tmp",
+            delete=False,
+        ) as tmp_file:
+            json.dump(
+                {
+                    "reconciled_at": self.reconciled_at,
+                    "keys": sorted(self.keys, key=repr),
+                    "pending_deletions": sorted(self.pending_deletions, key=repr),
+                },
+                tmp_file,
+            )
+        Path(tmp_file.name).replace(self.path)
+        self.changed = False
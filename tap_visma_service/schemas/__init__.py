@@ -1 +1,81 @@
-"""JSON schema files for the REST API."""
+"""JSON schema files for the REST API.
+
+Each stream's schema lives in its own ``<stream name>.json`` file. For runtime
+lookups the files are precompiled into a single bundle, so that starting the
+tap reads and parses one file instead of one per stream. Regenerate the bundle
+after editing any schema file with::
+
+    python -m tap_visma_service.schemas
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import typing as t
+from functools import cached_property
+from importlib import resources
+from pathlib import Path
+
+from singer_sdk.schema.source import SchemaSource
+
+if sys.version_info >= (3, 12):
+    from typing import override
+else:
+    from typing_extensions import override
+
+BUNDLE_FILENAME = "_bundle.json"
+
+
+def build_bundle() -> dict[str, dict[str, t.Any]]:
+    """Read every stream schema file into a single mapping.
+
+    Returns:
+        A mapping of stream names to JSON schema dictionaries, ordered by name.
+    """
+    schemas_dir = resources.files(__package__)
+    return {
+        path.name.removesuffix(".json"): json.loads(path.read_text(encoding="utf-8"))
+        for path in sorted(schemas_dir.iterdir(), key=lambda p: p.name)
+        if path.name.endswith(".json") and path.name != BUNDLE_FILENAME
+    }
+
+
+def write_bundle() -> Path:
+    """Write the precompiled schema bundle next to the schema files.
+
+    Returns:
+        The path of the written bundle.
+    """
+    bundle_path = Path(__file__).parent / BUNDLE_FILENAME
+    bundle_path.write_text(
+        json.dumps(build_bundle(), separators=(",", ":"), sort_keys=True) + "\n",
+        encoding="utf-8",
+    )
+    return bundle_path
+
+
+class SchemaBundle(SchemaSource):
+    """Schema source backed by the precompiled schema bundle.
+
+    The bundle is only read when the first schema is requested, so streams that
+    are never asked for their schema cost nothing.
+    """
+
+    @cached_property
+    def bundle(self) -> dict[str, dict[str, t.Any]]:
+        """Return the parsed bundle, reading it on first access."""
+        bundle_file = resources.files(__package__) / BUNDLE_FILENAME
+        return json.loads(bundle_file.read_text(encoding="utf-8"))  # type: ignore[no-any-return]
+
+    @override
+    def fetch_schema(self, key: str) -> dict[str, t.Any]:
+        """Retrieve a stream schema from the bundle.
+
+        Args:
+            key: The stream name.
+
+        Returns:
+            A JSON schema dictionary.
+        """
+        return self.bundle[key]
@@ -0,0 +1,7 @@
+"""Regenerate the precompiled schema bundle."""
+
+from __future__ import annotations
+
+from tap_visma_service.schemas import write_bundle
+
+print(f"Wrote {write_bundle()}")  # noqa: T201
@@ -0,0 +1,160 @@
+"""Split extraction across several tap processes and merge their states back.
+
+Run ``tap-visma-service --shard i/N`` in N processes, for ``i`` from 1 to N, all
+with the same config, catalog and input state. Streams whose partitions are
+split (``splits_across_shards``) are extracted by every shard, each taking a
+deterministic subset of their partitions. Every other stream is extracted whole
+by exactly one shard. Merge the resulting states, in any order, with::
+
+    python -m tap_visma_service.sharding shard-1.json ... shard-N.json > state.json
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import typing as t
+import zlib
+from dataclasses import dataclass
+
+# Partition state keys merged by keeping the earliest value for streams split across
+# shards, and the latest value otherwise.
+EARLIEST_KEYS = ("replication_key_value",)
+# Partition state keys always merged by keeping the latest value.
+LATEST_KEYS = ("reconciled_at",)
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One of ``count`` shards, numbered from 1."""
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        """Validate the shard numbering.
+
+        Raises:
+            ValueError: If the index is not between 1 and the shard count.
+        """
+        if not 1 <= self.index <= self.count:
+            msg = f"Shard index must be between 1 and {self.count}, got {self.index}"
+            raise ValueError(msg)
+
+    @classmethod
+    def parse(cls, value: str) -> Shard:
+        """Parse a shard given as ``i/N``.
+
+        Args:
+            value: The shard specification.
+
+        Returns:
+            The shard.
+
+        Raises:
+            ValueError: If the value is not of the form ``i/N``.
+        """
+        index, sep, count = value.partition("/")
+        if not sep or not index.strip().isdigit() or not count.strip().isdigit():
+            msg = f"Shard must be given as 'i/N', got '{value}'"
+            raise ValueError(msg)
+        return cls(int(index), int(count))
+
+    def owns(self, *partition: t.Any) -> bool:
+        """Return whether this shard extracts a partition.
+
+        The assignment only depends on the partition values, so every process
+        agrees on it without coordinating.
+
+        Args:
+            partition: The values identifying the partition, e.g. a stream name,
+                ledger and period.
+
+        Returns:
+            True if the partition belongs to this shard.
+        """
+        key = json.dumps([str(value) for value in partition]).encode()
+        return zlib.crc32(key) % self.count == self.index - 1
+
+
+def _merge_partition(partitions: list[dict], *, split: bool) -> dict:
+    merged: dict = {}
+    for partition in partitions:
+        for key, value in partition.items():
+            if value is None:
+                continue
+            if key not in merged or merged[key] is None:
+                merged[key] = value
+            elif key in EARLIEST_KEYS and split:
+                merged[key] = min(merged[key], value)
+            elif key in EARLIEST_KEYS or key in LATEST_KEYS:
+                merged[key] = max(merged[key], value)
+    return merged
+
+
+def _merge_stream(bookmarks: list[dict], *, split: bool) -> dict:
+    merged = _merge_partition(
+        [
+            {key: value for key, value in bookmark.items() if key != "partitions"}
+            for bookmark in bookmarks
+        ],
+        split=split,
+    )
+    partitions: dict[str, list[dict]] = {}
+    for bookmark in bookmarks:
+        for partition in bookmark.get("partitions", []):
+            context_key = json.dumps(partition.get("context"), sort_keys=True)
+            partitions.setdefault(context_key, []).append(partition)
+    if partitions:
+        merged["partitions"] = [
+            _merge_partition(partitions[context_key], split=split)
+            for context_key in sorted(partitions)
+        ]
+    return merged
+
+
+def merge_states(states: t.Sequence[dict]) -> dict:
+    """Merge the states written by each shard of a sharded run into one.
+
+    Every partition keeps its latest reconciliation time. For streams split
+    across shards, it also keeps the earliest replication key value any shard
+    reached, so the next incremental run resumes from a point every shard got
+    past. A stream extracted whole only advanced in the shard that owns it, so
+    its partitions keep the most advanced replication key value instead. The
+    result does not depend on the order of ``states``.
+
+    Args:
+        states: The final state of each shard.
+
+    Returns:
+        The merged Singer state.
+    """
+    from tap_visma_service.tap import STREAM_TYPES  # noqa: PLC0415
+
+    split_streams = {
+        stream_type.name for stream_type in STREAM_TYPES if stream_type.splits_across_shards
+    }
+    stream_names = sorted({name for state in states for name in state.get("bookmarks", {})})
+    bookmarks: dict[str, dict] = {}
+    for name in stream_names:
+        shard_bookmarks = [state.get("bookmarks", {}).get(name) for state in states]
+        bookmarks[name] = _merge_stream(
+            [b for b in shard_bookmarks if b], split=name in split_streams
+        )
+    return {"bookmarks": bookmarks}
+
+
+def main() -> None:
+    """Print the merge of the state files given as arguments."""
+    states = []
+    for path in sys.argv[1:]:
+        with open(path, encoding="utf-8") as state_file:  # noqa: PTH123
+            states.append(json.load(state_file))
+    if not states:
+        sys.exit("usage: python -m tap_visma_service.sharding SHARD_STATE...")
+    json.dump(merge_states(states), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,12 @@
 from __future__ import annotations
 
 import typing as t
-from pathlib import Path
 from datetime import datetime, timedelta
+from singer_sdk import metrics
 from singer_sdk import typing as th  # JSON Schema typing helpers
 
 from tap_visma_service.client import VismaServiceStream
 
-# TODO: Delete this is if not using json files for schema definition
-SCHEMAS_DIR = Path(__file__).parent / Path("./schemas")
 # TODO: - Override `UsersStream` and `GroupsStream` with your own stream definition.
 #       - Copy-paste as many times as needed to create multiple stream types.
 
@@ -22,7 +20,7 @@ class AccountsStream(VismaServiceStream):
     path = "/v1/account"
     primary_keys = ["accountID"]
     replication_key = "lastModifiedDateTime"
-    schema_filepath = SCHEMAS_DIR / "accounts.json"  # noqa: ERA001
+    supports_key_reconciliation = True
 
     # def get_new_paginator(self):
     #     # No pagination for this endpoint
@@ -48,7 +46,6 @@ class BranchesStream(VismaServiceStream):
     path = "/v1/branch"
     primary_keys = ["branchId"]
     replication_key = "lastModifiedDateTime"
-    schema_filepath = SCHEMAS_DIR / "branches.json"  # noqa: ERA001
 
     # def get_new_paginator(self):
     #     # No pagination for this endpoint
@@ -119,8 +116,8 @@ class BudgetsStream(VismaServiceStream):
     path = "/v1/budget"
     primary_keys = ["financialYear", "branchNumber", "ledgerId"]  # Updated to include all dimensions
     replication_key = "lastModifiedDateTime"
-    schema_filepath = SCHEMAS_DIR / "budgets.json"  # noqa: ERA001
     parent_stream_type = BranchesStream
+    splits_across_shards = True  # Split by branch, ledger and financial year
 
     def get_child_context(self, record, context):
         return super().get_child_context(record, context)
@@ -146,6 +143,10 @@ class BudgetsStream(VismaServiceStream):
         for ledger in ledgers:
             ledger_id = ledger["number"]
             for financial_year in financial_years:
+                if not self.shard_owns(
+                    self.name, context.get("branchNumber"), ledger_id, financial_year
+                ):
+                    continue
                 self._current_ledger_id = ledger_id  # Store temporarily
                 self._current_financial_year = str(financial_year)  # Store temporarily
                 self.logger.info(
@@ -196,7 +197,6 @@ class DepartmentsStream(VismaServiceStream):
     path = "/v1/department"
     primary_keys = ["departmentId"]
     replication_key = "lastModifiedDateTime"
-    schema_filepath = SCHEMAS_DIR / "departments.json"  # noqa: ERA001
 
     # def get_new_paginator(self):
     #     # No pagination for this endpoint
@@ -214,7 +214,6 @@ class LedgersStream(VismaServiceStream):
     path = "/v1/ledger"
     primary_keys = ["internalId"]
     replication_key = "lastModifiedDateTime"
-    schema_filepath = SCHEMAS_DIR / "ledgers.json"  # noqa: ERA001
 
     def get_child_context(self, record: dict, context: dict) -> dict:
         """Pass branchId to child stream"""
@@ -228,12 +227,27 @@ class GeneralLedgerTransactionsStream(VismaServiceStream):
     path = "/v1/GeneralLedgerTransactions"
     primary_keys = ["lineNumber", "batchNumber"]
     replication_key = "lastModifiedDateTime"
-    schema_filepath = SCHEMAS_DIR / "general_ledger_transactions.json"  # noqa: ERA001
+    supports_key_reconciliation = True
     parent_stream_type = LedgersStream
+    splits_across_shards = True  # Split by ledger and period
 
     def get_child_context(self, record, context):
         return super().get_child_context(record, context)
 
+    def get_context_slices(self, context):
+        """Fetch all periods at once, or period by period when sharded or reconciling.
+
+        Slicing by period keeps each key index and key fetch to one ledger period.
+        """
+        if self._tap.shard is None and not self.reconciles_keys:
+            return super().get_context_slices(context)
+
+        return [
+            {"period": period_id}
+            for period_id in self.get_period_list()
+            if self.shard_owns(self.name, context["ledgerId"], period_id)
+        ]
+
     def get_url_params(self, context, next_page_token):
         # Get base params from parent (pagination, start_date, replication key)
         params = super().get_url_params(context, next_page_token)
@@ -246,6 +260,11 @@ class GeneralLedgerTransactionsStream(VismaServiceStream):
         # Today's period in YYYYMM
         to_period = datetime.today().strftime("%Y%m")
 
+        # A single period when fetching one shard's periods
+        period_id = self.current_slice.get("period")
+        if period_id is not None:
+            from_period = to_period = period_id
+
         # Add stream-specific params
         params.update({
             "ledger": context["ledgerId"],
@@ -265,76 +284,57 @@ class JournalTransactionsStream(VismaServiceStream):
     path = "/v2/journaltransaction"
     primary_keys = ["module", "batchNumber", "financialPeriod"]  # Add periodId to primary key
     replication_key = None  # Disable replication key for this stream
-    schema_filepath = SCHEMAS_DIR / "journal_transactions.json"
+    splits_across_shards = True  # Split by period
 
     def get_new_paginator(self):
         return super().get_new_paginator()
 
-    def get_period_list(self):
-        """Generate all YYYYMM period IDs from start_date up to today."""
-        if self.config.get("start_date"):
-            start_date = datetime.fromisoformat(
-                self.config["start_date"].replace("Z", "").replace("T", " ")
-            )
-        else:
-            start_date = datetime(2023, 1, 1)
-
-        end_date = datetime.today()
-        periods = []
-
-        current = start_date
-        while current <= end_date:
-            periods.append(current.strftime("%Y%m"))
-            # Move to next month
-            if current.month == 12:
-                current = current.replace(year=current.year + 1, month=1)
-            else:
-                current = current.replace(month=current.month + 1)
+    def fetch_pages(self, context):
+        """Iterate over all periodIds with pagination and yield pages of records."""
+        decorated_request = self.request_decorator(self._request)
 
-        return periods
+        with metrics.http_request_counter(self.name, self.path) as request_counter:
+            request_counter.context = context
 
-    def get_records(self, context):
-        """Iterate over all periodIds with pagination and yield records."""
-        for period_id in self.get_period_list():
-            self.logger.info(f"Fetching records for period {period_id}...")
+            for period_id in self.get_period_list():
+                if not self.shard_owns(self.name, period_id):
+                    continue
+
+                self.logger.info(f"Fetching records for period {period_id}...")
             
-            page_number = 1
-            record_count = 0
+                page_number = 1
+                record_count = 0
             
-            while True:
-                # Build request URL with current period and page
-                self._current_period_id = period_id
-                self._current_page_number = page_number
+                while True:
+                    # Build request URL with current period and page
+                    self._current_period_id = period_id
+                    self._current_page_number = page_number
                 
-                # Get records for this page
-                params = self.get_url_params(context, page_number)
-                prepared_request = self.prepare_request(context, page_number)
+                    # Get records for this page
+                    prepared_request = self.prepare_request(context, page_number)
                 
-                response = self._request_with_backoff(
-                    prepared_request, context
-                )
+                    response = decorated_request(prepared_request, context)
+                    request_counter.increment()
+                    self.update_sync_costs(prepared_request, response, context)
                 
-                # Parse response
-                records = list(self.parse_response(response))
+                    # Parse response
+                    records = list(self.parse_response(response))
                 
-                # If no records returned, we've reached the end of this period
-                if not records:
-                    self.logger.info(f"No more records for period {period_id} at page {page_number}")
-                    break
+                    # If no records returned, we've reached the end of this period
+                    if not records:
+                        self.logger.info(f"No more records for period {period_id} at page {page_number}")
+                        break
                 
-                # Yield all records from this page
-                for record in records:
-                    processed_record = self.post_process(record, context)
-                    if processed_record:
-                        record_count += 1
-                        yield processed_record
+                    # Hand the page over to the record writer
+                    record_count += len(records)
+                    yield records, len(response.content)
                 
-                self.logger.debug(f"Period {period_id}, Page {page_number}: fetched {len(records)} records")
+                    self.logger.debug(f"Period {period_id}, Page {page_number}: fetched {len(records)} records")
                 
-                # Move to next page
-                page_number += 1
+                    # Move to next page
+                    page_number += 1
             
-            self.logger.info(f"Completed period {period_id}: {record_count} total records")
+                self.logger.info(f"Completed period {period_id}: {record_count} total records")
             
         self._current_period_id = None
         self._current_page_number = None
@@ -370,7 +370,6 @@ class ProjectsStream(VismaServiceStream):
     path = "/v1/project"
     primary_keys = ["projectID"]
     replication_key = "lastModifiedDateTime"
-    schema_filepath = SCHEMAS_DIR / "projects.json"  # noqa: ERA001
 
 class ProjectAccountGroupsStream(VismaServiceStream):
     """Define custom stream."""
@@ -379,7 +378,6 @@ class ProjectAccountGroupsStream(VismaServiceStream):
     path = "/v1/projectaccountgroup"
     primary_keys = ["accountGroupId"]
     replication_key = "accountGroupId"
-    schema_filepath = SCHEMAS_DIR / "project_account_groups.json"  # noqa: ERA001
 
 class ProjectBudgetsStream(VismaServiceStream):
     """Define custom stream."""
@@ -388,7 +386,6 @@ class ProjectBudgetsStream(VismaServiceStream):
     path = "/v1/projectbudget"
     primary_keys = ["projectID"]
     replication_key = "projectID"
-    schema_filepath = SCHEMAS_DIR / "project_budgets.json"  # noqa: ERA001
 
 class SubaccountsStream(VismaServiceStream):
     """Define custom stream."""
@@ -397,7 +394,6 @@ class SubaccountsStream(VismaServiceStream):
     path = "/v1/subaccount"
     primary_keys = ["subaccountId"]
     replication_key = "lastModifiedDateTime"
-    schema_filepath = SCHEMAS_DIR / "subaccounts.json"
 
 class SuppliersStream(VismaServiceStream):
     """Define custom stream."""
@@ -406,4 +402,4 @@ class SuppliersStream(VismaServiceStream):
     path = "/v1/supplier"
     primary_keys = ["internalId"]
     replication_key = "lastModifiedDateTime"
-    schema_filepath = SCHEMAS_DIR / "suppliers.json"
+    supports_key_reconciliation = True
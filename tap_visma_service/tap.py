@@ -3,18 +3,38 @@
 from __future__ import annotations
 
 import sys
+import typing as t
+from functools import cached_property
 
+import click
 from singer_sdk import Tap
 from singer_sdk import typing as th  # JSON schema typing helpers
+from singer_sdk.exceptions import ConfigValidationError
 
 # TODO: Import your custom stream types here:
 from tap_visma_service import streams
+from tap_visma_service.sharding import Shard
 
 if sys.version_info >= (3, 12):
     from typing import override
 else:
     from typing_extensions import override
 
+STREAM_TYPES: tuple[type[streams.VismaServiceStream], ...] = (
+    streams.AccountsStream,
+    streams.BranchesStream,
+    streams.BudgetsStream,
+    streams.DepartmentsStream,
+    streams.GeneralLedgerTransactionsStream,
+    streams.JournalTransactionsStream,
+    streams.LedgersStream,
+    streams.ProjectsStream,
+    streams.ProjectAccountGroupsStream,
+    streams.ProjectBudgetsStream,
+    streams.SubaccountsStream,
+    streams.SuppliersStream,
+)
+
 
 class TapVismaService(Tap):
     """VismaService tap class."""
@@ -48,31 +68,180 @@ class TapVismaService(Tap):
             "start_date",
             th.DateTimeType(nullable=True),
             description="The earliest record date to sync",
-        )
+        ),
+        th.Property(
+            "reconciliation_interval_hours",
+            th.IntegerType(nullable=True),
+            title="Reconciliation Interval (Hours)",
+            description=(
+                "How often streams that support it fetch all primary keys to detect "
+                "deleted records, which are emitted with `_sdc_deleted_at` set. "
+                "Leave unset to disable deletion detection."
+            ),
+        ),
+        th.Property(
+            "key_index_dir",
+            th.StringType(nullable=False),
+            default=".key_index",
+            title="Key Index Directory",
+            description=(
+                "Directory holding the primary keys emitted so far, used to detect "
+                "deleted records. It must persist between runs."
+            ),
+        ),
+        th.Property(
+            "reconciliation_max_workers",
+            th.IntegerType(nullable=False),
+            default=4,
+            title="Reconciliation Max Workers",
+            description="How many pages of primary keys to fetch concurrently",
+        ),
+        th.Property(
+            "shard",
+            th.StringType(nullable=True, pattern=r"^\s*\d+\s*/\s*\d+\s*$"),
+            title="Shard",
+            description=(
+                "Extract only this process's share of the partitions, given as 'i/N' "
+                "to run as shard i of N. Overridden by the --shard option."
+            ),
+        ),
+        th.Property(
+            "prefetch_max_pages",
+            th.IntegerType(nullable=False),
+            default=2,
+            title="Prefetch Max Pages",
+            description=(
+                "Maximum number of fetched pages buffered ahead of the record writer. "
+                "Set to 0 to fetch pages only when the writer needs them."
+            ),
+        ),
+        th.Property(
+            "prefetch_max_bytes",
+            th.IntegerType(nullable=False),
+            default=64 * 1024 * 1024,
+            title="Prefetch Max Bytes",
+            description=(
+                "Maximum total response size of the pages buffered ahead of the record "
+                "writer. A single larger page is still buffered on its own."
+            ),
+        ),
     ).to_dict()
 
+    # Set from the --shard command line option, which takes precedence over config.
+    cli_shard: t.ClassVar[str | None] = None
+
+    def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:
+        """Initialize the tap, rejecting an invalid shard before any stream runs.
+
+        Args:
+            args: The standard tap arguments.
+            kwargs: The standard tap keyword arguments.
+
+        Raises:
+            ConfigValidationError: If the shard setting is not a valid ``i/N``.
+        """
+        super().__init__(*args, **kwargs)
+        try:
+            self.shard  # noqa: B018
+        except ValueError as e:
+            msg = "Config validation failed"
+            raise ConfigValidationError(msg, errors=[str(e)]) from e
+
+    @cached_property
+    def shard(self) -> Shard | None:
+        """Return the shard this process extracts, or ``None`` when not sharded."""
+        value = self.cli_shard or self.config.get("shard")
+        return Shard.parse(value) if value else None
+
+    @override
+    @classmethod
+    def invoke(cls, *, shard: str | None = None, **kwargs: t.Any) -> None:
+        """Invoke the tap's command line interface.
+
+        Args:
+            shard: The ``--shard`` option, as ``i/N``.
+            kwargs: The standard tap options.
+        """
+        cls.cli_shard = shard
+        super().invoke(**kwargs)
+
+    @classmethod
+    def cb_shard(
+        cls,
+        ctx: click.Context,  # noqa: ARG003
+        param: click.Option,  # noqa: ARG003
+        value: str | None,
+    ) -> str | None:
+        """CLI callback to validate the shard option.
+
+        Raises:
+            click.BadParameter: If the value is not of the form ``i/N``.
+        """
+        if value is not None:
+            try:
+                Shard.parse(value)
+            except ValueError as e:
+                raise click.BadParameter(str(e)) from e
+        return value
+
+    @override
+    @classmethod
+    def get_singer_command(cls) -> click.Command:
+        """Execute standard CLI handler for taps, with the ``--shard`` option.
+
+        Returns:
+            A click.Command object.
+        """
+        command = super().get_singer_command()
+        command.params.append(
+            click.Option(
+                ["--shard"],
+                help=(
+                    "Run as shard i of N, given as 'i/N'. Merge the shards' states "
+                    "with `python -m tap_visma_service.sharding`."
+                ),
+                callback=cls.cb_shard,
+            ),
+        )
+        return command
+
     @override
     def discover_streams(self) -> list[streams.VismaServiceStream]:
         """Return a list of discovered streams.
 
+        Only the stream types required by the input catalog are instantiated, see
+        :meth:`get_required_stream_types`.
+
         Returns:
             A list of discovered streams.
         """
-        return [
-            streams.AccountsStream(self),
-            streams.BranchesStream(self),
-            streams.BudgetsStream(self),
-            streams.DepartmentsStream(self),
-            streams.GeneralLedgerTransactionsStream(self),
-            streams.JournalTransactionsStream(self),
-            streams.LedgersStream(self),
-            streams.ProjectsStream(self),
-            streams.ProjectAccountGroupsStream(self),
-            streams.ProjectBudgetsStream(self),
-            streams.SubaccountsStream(self),
-            streams.SuppliersStream(self),
-        ]
+        return [stream_type(self) for stream_type in self.get_required_stream_types()]
+
+    def get_required_stream_types(self) -> list[type[streams.VismaServiceStream]]:
+        """Return the stream types needed to serve the input catalog.
+
+        Without an input catalog (discovery) every stream type is required. With one,
+        only the selected streams and their ancestors are, since parent streams must
+        run to generate their children's contexts even when they are not selected
+        themselves.
+
+        Returns:
+            A list of stream types, in the order of ``STREAM_TYPES``.
+        """
+        if self.input_catalog is None:
+            return list(STREAM_TYPES)
+
+        required: set[type[streams.VismaServiceStream]] = set()
+        for stream_type in STREAM_TYPES:
+            entry = self.input_catalog.get_stream(stream_type.name)
+            if entry is None or not entry.metadata.resolve_selection().get((), False):
+                continue
+            ancestor: type[streams.VismaServiceStream] | None = stream_type
+            while ancestor is not None:
+                required.add(ancestor)
+                ancestor = ancestor.parent_stream_type  # type: ignore[assignment]
 
+        return [stream_type for stream_type in STREAM_TYPES if stream_type in required]
 
 if __name__ == "__main__":
     TapVismaService.cli()
@@ -0,0 +1,59 @@
+"""Shared fixtures for tests that talk to a fake Visma API."""
+
+from __future__ import annotations
+
+import json
+import typing as t
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from tap_visma_service.client import VismaServiceStream
+
+Handler = t.Callable[[dict[str, str]], list[dict]]
+
+
+class FakeResponse:
+    """Stand-in for ``requests.Response`` carrying a JSON array of rows."""
+
+    def __init__(self, rows: list[dict]) -> None:
+        self.content = json.dumps(rows).encode()
+
+    def json(self, **kwargs: t.Any) -> t.Any:
+        return json.loads(self.content, **kwargs)
+
+
+class FakeAPI:
+    """Serves stream requests from per-path handlers and logs their params."""
+
+    def __init__(self) -> None:
+        self.handlers: dict[str, Handler] = {}
+        self.requests: list[tuple[str, dict[str, str]]] = []
+
+    def route(self, path: str, handler: Handler) -> None:
+        """Answer requests to ``path`` with the rows returned by ``handler``."""
+        self.handlers[path] = handler
+
+    def params(self, path: str) -> list[dict[str, str]]:
+        """Return the query params of every request made to ``path``."""
+        return [params for request_path, params in self.requests if request_path == path]
+
+    def send(self, prepared_request: t.Any) -> FakeResponse:
+        url = urlparse(prepared_request.url)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.requests.append((url.path, params))
+        handler = self.handlers.get(url.path, lambda _params: [])
+        return FakeResponse(handler(params))
+
+
+@pytest.fixture
+def fake_api(monkeypatch) -> FakeAPI:
+    """Route every stream request, without authentication, to a fake API."""
+    api = FakeAPI()
+    monkeypatch.setattr(VismaServiceStream, "authenticator", None)
+    monkeypatch.setattr(
+        VismaServiceStream,
+        "_request",
+        lambda _stream, prepared_request, _context: api.send(prepared_request),
+    )
+    return api
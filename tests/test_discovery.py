@@ -0,0 +1,50 @@
+"""Tests lazy stream construction and the precompiled schema bundle."""
+
+from __future__ import annotations
+
+from tap_visma_service.schemas import BUNDLE_FILENAME, SchemaBundle, build_bundle
+from tap_visma_service.tap import STREAM_TYPES, TapVismaService
+
+SAMPLE_CONFIG = {
+    "client_id": "client-id",
+    "client_secret": "client-secret",
+}
+
+
+def _catalog_selecting(*stream_names: str) -> dict:
+    catalog = TapVismaService(config=SAMPLE_CONFIG).catalog_dict
+    for entry in catalog["streams"]:
+        for metadata in entry["metadata"]:
+            if metadata["breadcrumb"] == []:
+                metadata["metadata"]["selected"] = entry["tap_stream_id"] in stream_names
+    return catalog
+
+
+def test_schema_bundle_is_up_to_date():
+    """The committed bundle must match the individual schema files."""
+    assert SchemaBundle().bundle == build_bundle(), (
+        f"{BUNDLE_FILENAME} is stale, run `python -m tap_visma_service.schemas`"
+    )
+
+
+def test_discovery_builds_every_stream():
+    tap = TapVismaService(config=SAMPLE_CONFIG)
+    assert sorted(tap.streams) == sorted(stream_type.name for stream_type in STREAM_TYPES)
+    for stream in tap.streams.values():
+        assert stream.schema == build_bundle()[stream.name]
+
+
+def test_catalog_builds_selected_streams_only():
+    tap = TapVismaService(config=SAMPLE_CONFIG, catalog=_catalog_selecting("suppliers"))
+    assert list(tap.streams) == ["suppliers"]
+
+
+def test_catalog_builds_ancestors_of_selected_child_streams():
+    catalog = _catalog_selecting("general_ledger_transactions")
+    tap = TapVismaService(config=SAMPLE_CONFIG, catalog=catalog)
+
+    assert sorted(tap.streams) == ["general_ledger_transactions", "ledgers"]
+    assert not tap.streams["ledgers"].selected
+    assert tap.streams["ledgers"].child_streams == [
+        tap.streams["general_ledger_transactions"]
+    ]
@@ -0,0 +1,116 @@
+"""Tests the bounded page pipeline between fetching and writing records."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from tap_visma_service.pipeline import PagePipeline
+from tap_visma_service.tap import TapVismaService
+
+
+def test_pages_are_delivered_in_order():
+    pipeline: PagePipeline[int] = PagePipeline(max_pages=2, max_bytes=100)
+    pages = ((i, 10) for i in range(20))
+
+    assert list(pipeline.run(pages, name="test")) == list(range(20))
+    assert pipeline.stats.pages == 20
+    assert pipeline.stats.bytes == 200
+
+
+@pytest.mark.parametrize(
+    ("max_pages", "max_bytes", "expected_depth"),
+    [
+        pytest.param(3, 10_000, 3, id="pages"),
+        pytest.param(100, 25, 2, id="bytes"),
+    ],
+)
+def test_queue_depth_is_bounded(max_pages, max_bytes, expected_depth):
+    pipeline: PagePipeline[int] = PagePipeline(max_pages=max_pages, max_bytes=max_bytes)
+    produced = []
+
+    def pages():
+        for i in range(10):
+            produced.append(i)
+            yield i, 10
+
+    consumed = []
+    for page in pipeline.run(pages(), name="test"):
+        # Let the producer fill the queue before taking the next page.
+        threading.Event().wait(0.02)
+        # Pages produced but not consumed: the queue plus the one in the producer's hands.
+        assert len(produced) - len(consumed) <= expected_depth + 2
+        consumed.append(page)
+
+    assert consumed == list(range(10))
+    assert pipeline.stats.producer_blocked_seconds > 0
+
+
+def test_oversized_page_is_not_deadlocked():
+    pipeline: PagePipeline[str] = PagePipeline(max_pages=2, max_bytes=10)
+    pages = [("small", 5), ("huge", 1_000), ("small", 5)]
+
+    assert list(pipeline.run(pages, name="test")) == ["small", "huge", "small"]
+
+
+def test_producer_error_reaches_consumer():
+    def pages():
+        yield "first", 1
+        msg = "boom"
+        raise RuntimeError(msg)
+
+    pipeline: PagePipeline[str] = PagePipeline(max_pages=2, max_bytes=100)
+    consumed = []
+    with pytest.raises(RuntimeError, match="boom"):
+        consumed.extend(pipeline.run(pages(), name="test"))
+    assert consumed == ["first"]
+
+
+def test_consumer_stopping_early_stops_producer():
+    finalized = threading.Event()
+
+    def pages():
+        try:
+            i = 0
+            while True:
+                yield i, 1
+                i += 1
+        finally:
+            finalized.set()
+
+    pipeline: PagePipeline[int] = PagePipeline(max_pages=2, max_bytes=100)
+    consumer = pipeline.run(pages(), name="test")
+    assert next(consumer) == 0
+    consumer.close()
+
+    assert finalized.is_set()
+
+
+@pytest.mark.parametrize("prefetch_max_pages", [0, 1])
+def test_journal_transactions_stream_pages(fake_api, monkeypatch, prefetch_max_pages):
+    tap = TapVismaService(
+        config={
+            "client_id": "client-id",
+            "client_secret": "client-secret",
+            "start_date": "2024-11-01T00:00:00Z",
+            "prefetch_max_pages": prefetch_max_pages,
+        },
+    )
+    stream = tap.streams["journal_transactions"]
+    monkeypatch.setattr(stream, "get_period_list", lambda: ["202411", "202412"])
+    source = {("202411", "1"): 3, ("202411", "2"): 2, ("202412", "1"): 1}
+
+    def serve(params):
+        rows = source.get((params["periodId"], params["pageNumber"]), 0)
+        return [{"batchNumber": f"{params['periodId']}-{i}"} for i in range(rows)]
+
+    fake_api.route("/v2/journaltransaction", serve)
+    costs = []
+    stream.update_sync_costs = lambda request, response, context: costs.append(request.url)
+
+    records = list(stream.get_records(None))
+    assert len(costs) == len(fake_api.requests) == 5
+    assert [r["batchNumber"] for r in records] == [
+        "202411-0", "202411-1", "202411-2", "202411-0", "202411-1", "202412-0",
+    ]
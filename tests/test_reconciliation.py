@@ -0,0 +1,215 @@
+"""Tests deleted record detection by primary key reconciliation."""
+
+from __future__ import annotations
+
+import copy
+from decimal import Decimal
+
+import pytest
+
+from tap_visma_service.client import RECONCILED_AT_KEY
+from tap_visma_service.reconciliation import KeyIndex
+from tap_visma_service.streams import SuppliersStream
+from tap_visma_service.tap import TapVismaService
+
+
+@pytest.fixture
+def suppliers(tmp_path, fake_api) -> tuple[SuppliersStream, list[dict]]:
+    """Return a suppliers stream served by the fake API, and the rows it serves."""
+    tap = TapVismaService(
+        config={
+            "client_id": "client-id",
+            "client_secret": "client-secret",
+            "reconciliation_interval_hours": 24,
+            "key_index_dir": str(tmp_path),
+            "reconciliation_max_workers": 2,
+        },
+    )
+    source: list[dict] = []
+
+    def serve(params):
+        page_size = int(params.get("pageSize", 1000))
+        start = (int(params["pageNumber"]) - 1) * page_size
+        return source[start : start + page_size]
+
+    fake_api.route("/v1/supplier", serve)
+    return tap.streams["suppliers"], source
+
+
+def test_key_index_round_trip(tmp_path):
+    index = KeyIndex.for_context(tmp_path, "general_ledger_transactions", {"ledgerId": "1"})
+    index.add((1, "GL0001"))
+    index.add((2, "GL0001"))
+    index.save()
+
+    reloaded = KeyIndex.for_context(tmp_path, "general_ledger_transactions", {"ledgerId": "1"})
+    assert reloaded.keys == {(1, "GL0001"), (2, "GL0001")}
+    assert reloaded.replace({(2, "GL0001")}, "2025-01-01T00:00:00+00:00") == {(1, "GL0001")}
+    assert reloaded.keys == {(2, "GL0001")}
+    reloaded.save()
+
+    # Deleted keys come back unless the state confirms the reconciliation.
+    uncommitted = KeyIndex.for_context(tmp_path, "general_ledger_transactions", {"ledgerId": "1"})
+    assert uncommitted.keys == {(1, "GL0001"), (2, "GL0001")}
+    committed = KeyIndex.for_context(
+        tmp_path,
+        "general_ledger_transactions",
+        {"ledgerId": "1"},
+        "2025-01-01T00:00:00+00:00",
+    )
+    assert committed.keys == {(2, "GL0001")}
+
+
+def test_reconciliation_emits_deletion_markers(suppliers, fake_api, tmp_path):
+    stream, source = suppliers
+    index = KeyIndex.for_context(tmp_path, "suppliers", None)
+    for key in (1, 2, 3):
+        index.add((key,))
+    index.save()
+    source.extend({"internalId": i, "lastModifiedDateTime": "2025-01-01"} for i in (2, 3, 4))
+
+    records = list(stream.get_records(None))
+
+    assert [r["internalId"] for r in records] == [2, 3, 4, 1]
+    assert records[-1]["_sdc_deleted_at"] is not None
+    assert records[-1]["lastModifiedDateTime"] is None
+    reconciled_at = stream.get_context_state(None)[RECONCILED_AT_KEY]
+    index = KeyIndex.for_context(tmp_path, "suppliers", None, reconciled_at)
+    assert index.keys == {(2,), (3,), (4,)}
+    assert "pageSize" in fake_api.params("/v1/supplier")[-1]
+
+    # The next run is within the interval, so no keys are fetched.
+    fake_api.requests.clear()
+    assert [r["internalId"] for r in stream.get_records(None)] == [2, 3, 4]
+    assert len(fake_api.requests) == 1
+
+
+def test_fetch_record_keys_pages_in_parallel_waves(suppliers, fake_api):
+    stream, source = suppliers
+    source.extend({"internalId": i} for i in range(2500))
+
+    assert stream.fetch_record_keys(None) == {(i,) for i in range(2500)}
+    assert sorted(int(r["pageNumber"]) for r in fake_api.params("/v1/supplier")) == [1, 2, 3, 4]
+
+
+def test_reconciliation_disabled_without_interval(suppliers, fake_api, tmp_path, monkeypatch):
+    stream, source = suppliers
+    monkeypatch.delitem(stream._config, "reconciliation_interval_hours")
+    source.append({"internalId": 1})
+
+    assert [r["internalId"] for r in stream.get_records(None)] == [1]
+    assert len(fake_api.requests) == 1
+    assert not (tmp_path / "suppliers").exists()
+
+
+def test_reconciled_keys_match_synced_keys(suppliers, fake_api, monkeypatch, tmp_path):
+    stream, source = suppliers
+    # Keys parsed as decimals must compare equal across syncs, key fetches and reloads.
+    source.extend({"internalId": 1, "number": value} for value in (0.1, 0.2))
+    stream.primary_keys = ["internalId", "number"]
+    monkeypatch.setitem(
+        stream.schema["properties"], "number", {"type": ["number", "null"]}
+    )
+
+    assert len(list(stream.get_records(None))) == 2
+    assert KeyIndex.for_context(tmp_path, "suppliers", None).keys == {(1, "0.1"), (1, "0.2")}
+
+    source.pop()
+    stream.get_context_state(None).pop(RECONCILED_AT_KEY)
+    records = list(stream.get_records(None))
+    assert records[-1]["number"] == Decimal("0.2")
+    assert [r.get("_sdc_deleted_at") is not None for r in records] == [False, True]
+
+
+def test_key_fetch_counts_requests(suppliers, fake_api):
+    stream, source = suppliers
+    source.extend({"internalId": i} for i in range(1500))
+    counts = []
+    stream.update_sync_costs = lambda request, response, context: counts.append(request.url)
+
+    stream.fetch_record_keys(None)
+    assert len(counts) == len(fake_api.requests) == 2
+
+
+def test_uncommitted_reconciliation_is_repeated(tmp_path, fake_api):
+    source = [{"internalId": i} for i in (1, 2)]
+    fake_api.route("/v1/supplier", lambda params: source)
+
+    def run(state: dict) -> tuple[list[dict], dict]:
+        tap = TapVismaService(
+            config={
+                "client_id": "client-id",
+                "client_secret": "client-secret",
+                "reconciliation_interval_hours": 0,
+                "key_index_dir": str(tmp_path),
+            },
+            state=copy.deepcopy(state),
+        )
+        records = list(tap.streams["suppliers"].get_records(None))
+        return records, copy.deepcopy(tap.state)
+
+    _, committed_state = run({})
+    source.pop()
+
+    # The orchestrator drops the output of the first run after the deletion, so
+    # the next run starts from the same state and must report it again.
+    for _ in range(2):
+        records, next_state = run(committed_state)
+        assert [r["internalId"] for r in records if r.get("_sdc_deleted_at")] == [2]
+
+    records, _ = run(next_state)
+    assert not [r for r in records if r.get("_sdc_deleted_at")]
+
+
+def test_ledger_transactions_reconcile_period_by_period(tmp_path, fake_api, monkeypatch):
+    tap = TapVismaService(
+        config={
+            "client_id": "client-id",
+            "client_secret": "client-secret",
+            "reconciliation_interval_hours": 24,
+            "key_index_dir": str(tmp_path),
+        },
+    )
+    stream = tap.streams["general_ledger_transactions"]
+    monkeypatch.setattr(stream, "get_period_list", lambda: ["202401", "202402"])
+    fake_api.route(
+        "/v1/GeneralLedgerTransactions",
+        lambda params: [{"lineNumber": 1, "batchNumber": params["FromPeriod"]}],
+    )
+
+    list(stream.get_records({"ledgerId": "1"}))
+
+    assert sorted(p.name for p in (tmp_path / stream.name).iterdir()) == [
+        "ledgerId=1__period=202401.json",
+        "ledgerId=1__period=202402.json",
+    ]
+    for params in fake_api.params("/v1/GeneralLedgerTransactions"):
+        assert params["FromPeriod"] == params["ToPeriod"]
+
+
+def test_unchanged_key_index_is_not_rewritten(tmp_path):
+    index = KeyIndex.for_context(tmp_path, "suppliers", None)
+    index.add((1,))
+    index.save()
+
+    reloaded = KeyIndex.for_context(tmp_path, "suppliers", None)
+    reloaded.path.unlink()
+    reloaded.add((1,))
+    reloaded.save()
+    assert not reloaded.path.exists()
+
+    reloaded.add((2,))
+    reloaded.save()
+    assert reloaded.path.exists()
+
+
+def test_deletion_markers_leave_bookmark_alone(suppliers, caplog):
+    stream, _ = suppliers
+    stream._increment_stream_state({"internalId": 1, "lastModifiedDateTime": "2025-01-01"})
+    marker = stream.get_deletion_marker((2,), "2025-02-01T00:00:00+00:00")
+    stream._increment_stream_state(marker)
+
+    assert stream.get_context_state(None)["progress_markers"]["replication_key_value"] == (
+        "2025-01-01"
+    )
+    assert "null" not in caplog.text
@@ -0,0 +1,210 @@
+"""Tests splitting extraction across shards and merging their states."""
+
+from __future__ import annotations
+
+import pytest
+from singer_sdk.exceptions import ConfigValidationError
+
+from tap_visma_service.client import RECONCILED_AT_KEY
+from tap_visma_service.reconciliation import KeyIndex
+from tap_visma_service.sharding import Shard, merge_states
+from tap_visma_service.tap import STREAM_TYPES, TapVismaService
+
+SAMPLE_CONFIG = {
+    "client_id": "client-id",
+    "client_secret": "client-secret",
+    "start_date": "2024-01-01T00:00:00Z",
+}
+
+
+def _tap(shard: str | None) -> TapVismaService:
+    return TapVismaService(config={**SAMPLE_CONFIG, "shard": shard})
+
+
+@pytest.mark.parametrize("value", ["", "1", "0/2", "3/2", "a/b", "1/"])
+def test_invalid_shards_are_rejected(value):
+    with pytest.raises(ValueError, match="[Ss]hard"):
+        Shard.parse(value)
+
+
+@pytest.mark.parametrize("value", ["3/2", "0/2", "a/b", "1/"])
+def test_invalid_shard_config_is_rejected(value):
+    with pytest.raises(ConfigValidationError):
+        _tap(value)
+
+
+def test_each_partition_belongs_to_exactly_one_shard():
+    shards = [Shard(i, 3) for i in range(1, 4)]
+    partitions = [
+        ("general_ledger_transactions", ledger, f"2024{month:02d}")
+        for ledger in range(10)
+        for month in range(1, 13)
+    ]
+    for partition in partitions:
+        assert sum(shard.owns(*partition) for shard in shards) == 1
+    # Partitions are spread rather than piled on a single shard.
+    assert all(sum(shard.owns(*p) for p in partitions) > 20 for shard in shards)
+
+
+def test_split_streams():
+    assert {
+        stream_type.name for stream_type in STREAM_TYPES if stream_type.splits_across_shards
+    } == {"general_ledger_transactions", "journal_transactions", "budgets"}
+
+
+def test_unsplit_streams_are_extracted_by_one_shard():
+    taps = [_tap(f"{i}/3") for i in range(1, 4)]
+    for stream_type in STREAM_TYPES:
+        selected = [tap.streams[stream_type.name].selected for tap in taps]
+        if stream_type.splits_across_shards:
+            assert all(selected), stream_type.name
+        else:
+            assert sum(selected) == 1, stream_type.name
+
+
+def test_general_ledger_transactions_request_owned_periods(fake_api, monkeypatch):
+    requested_periods = []
+    for i in (1, 2):
+        stream = _tap(f"{i}/2").streams["general_ledger_transactions"]
+        monkeypatch.setattr(stream, "get_period_list", lambda: ["202401", "202402", "202403"])
+        fake_api.requests.clear()
+        list(stream.get_records({"ledgerId": "1"}))
+
+        for params in fake_api.params("/v1/GeneralLedgerTransactions"):
+            assert params["FromPeriod"] == params["ToPeriod"]
+            requested_periods.append(params["FromPeriod"])
+
+    assert sorted(requested_periods) == ["202401", "202402", "202403"]
+
+
+def test_budgets_request_owned_partitions(fake_api):
+    fake_api.route("/v1/ledger", lambda _params: [{"number": "L1"}, {"number": "L2"}])
+    branches = ["B1", "B2", "B3"]
+    requested = []
+    for i in (1, 2, 3):
+        stream = _tap(f"{i}/3").streams["budgets"]
+        assert stream.selected
+        for branch in branches:
+            fake_api.requests.clear()
+            list(stream.get_records({"branchNumber": branch, "ledgerId": "L1"}))
+            requested.extend(
+                (params["branch"], params["ledger"], params["financialYear"])
+                for params in fake_api.params("/v1/budget")
+            )
+
+    years = [str(year) for year in stream.get_financial_years()]
+    expected = [
+        (branch, ledger, year) for branch in branches for ledger in ("L1", "L2") for year in years
+    ]
+    assert sorted(requested) == sorted(expected)
+
+
+def test_unsharded_general_ledger_transactions_request_whole_range():
+    stream = _tap(None).streams["general_ledger_transactions"]
+    params = stream.get_url_params({"ledgerId": "1"}, 1)
+    assert params["FromPeriod"] == "202401"
+    assert params["ToPeriod"] != "202401"
+
+
+def test_merge_states():
+    stale = {
+        "replication_key": "lastModifiedDateTime",
+        "replication_key_value": "2024-01-01",
+        "reconciled_at": "2024-01-02T00:00:00",
+    }
+    fresh = {"replication_key": "lastModifiedDateTime", "replication_key_value": "2025-06-01"}
+
+    def gl_partition(ledger: str, value: str, **extra: str) -> dict:
+        return {
+            "context": {"ledgerId": ledger},
+            "replication_key": "lastModifiedDateTime",
+            "replication_key_value": value,
+            **extra,
+        }
+
+    states = [
+        {
+            "bookmarks": {
+                "suppliers": stale,
+                "general_ledger_transactions": {
+                    "partitions": [
+                        gl_partition("1", "2025-05-01", reconciled_at="2025-06-01T00:00:00"),
+                        gl_partition("2", "2025-06-01"),
+                    ],
+                },
+            },
+        },
+        {
+            "bookmarks": {
+                "suppliers": fresh,
+                "general_ledger_transactions": {
+                    "partitions": [
+                        gl_partition("1", "2025-06-01", reconciled_at="2025-01-01T00:00:00"),
+                    ],
+                },
+            },
+        },
+    ]
+
+    merged = merge_states(states)["bookmarks"]
+
+    assert merge_states(states[::-1])["bookmarks"] == merged
+    assert merged["suppliers"] == {**fresh, "reconciled_at": "2024-01-02T00:00:00"}
+    assert merged["general_ledger_transactions"]["partitions"] == [
+        gl_partition("1", "2025-05-01", reconciled_at="2025-06-01T00:00:00"),
+        gl_partition("2", "2025-06-01"),
+    ]
+
+
+def test_shards_index_and_reconcile_only_owned_partitions(fake_api, tmp_path):
+    periods = ["202401", "202402", "202403", "202404"]
+
+    def serve(params):
+        return [{"lineNumber": 1, "batchNumber": params["FromPeriod"]}]
+
+    fake_api.route("/v1/GeneralLedgerTransactions", serve)
+    for i in (1, 2):
+        tap = TapVismaService(
+            config={
+                **SAMPLE_CONFIG,
+                "shard": f"{i}/2",
+                "reconciliation_interval_hours": 24,
+                "key_index_dir": str(tmp_path),
+            },
+        )
+        stream = tap.streams["general_ledger_transactions"]
+        stream.get_period_list = lambda: periods
+        fake_api.requests.clear()
+        list(stream.get_records({"ledgerId": "1"}))
+
+        owned = [p for p in periods if tap.shard.owns(stream.name, "1", p)]
+        # Records and keys are both requested one owned period at a time.
+        requests = fake_api.params("/v1/GeneralLedgerTransactions")
+        assert all(params["FromPeriod"] == params["ToPeriod"] for params in requests)
+        data_requests = [params for params in requests if "pageSize" not in params]
+        key_requests = [params for params in requests if "pageSize" in params]
+        assert sorted(params["FromPeriod"] for params in data_requests) == owned
+        assert sorted({params["FromPeriod"] for params in key_requests}) == owned
+        for period in owned:
+            index = KeyIndex.for_context(
+                tmp_path, stream.name, {"ledgerId": "1", "period": period}
+            )
+            assert index.keys == {(1, period)}
+            state = stream.get_context_state({"ledgerId": "1", "period": period})
+            assert RECONCILED_AT_KEY in state
+
+        # Unsplit streams owned by another shard keep no key index.
+        suppliers = tap.streams["suppliers"]
+        if not suppliers.selected:
+            list(suppliers.get_records(None))
+
+    assert sorted(path.name for path in (tmp_path / "general_ledger_transactions").iterdir()) == [
+        f"ledgerId=1__period={period}.json" for period in periods
+    ]
+    assert not (tmp_path / "suppliers").exists()
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_merge_states_with_empty_bookmarks():
+    states = [{"bookmarks": {"suppliers": {}, "budgets": {}}} for _ in range(2)]
+    assert merge_states(states) == {"bookmarks": {"suppliers": {}, "budgets": {}}}